@@ -2,19 +2,79 @@
 
 import sys
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google.cloud import compute_v1
 from google.api_core import exceptions
+from requests.adapters import HTTPAdapter
+
+# Number of projects scanned concurrently
+MAX_WORKERS = 32
+# Number of zones/regions listed concurrently within a project
+LOCATION_WORKERS = 16
+
+# HTTP connections kept alive per shared client, enough for every worker thread
+POOL_SIZE = MAX_WORKERS * LOCATION_WORKERS
+
+# Partial-response field masks: only the fields read below are sent by the server.
+# nextPageToken must stay in the mask or pagination stops after the first page.
+INSTANCE_FIELDS = "items(name,machineType,networkInterfaces/accessConfigs/natIP),nextPageToken"
+ADDRESS_FIELDS = "items(name,address,addressType),nextPageToken"
+FORWARDING_RULE_FIELDS = "items(name,IPAddress,IPProtocol,target),nextPageToken"
+LOCATION_FIELDS = "items(name),nextPageToken"
+
+# Zone and region names per project, looked up once
+_zones_cache = {}
+_regions_cache = {}
+# One lock per (cache, project) so concurrent scans of a project share a single lookup
+_location_locks = {}
+
+# One shared client per client class, built under a lock so concurrent first calls share it
+_clients = {}
+_client_lock = threading.Lock()
+
+def get_client(client_class):
+    """Return one shared client per type, reusing its HTTP connections across threads."""
+    with _client_lock:
+        if client_class not in _clients:
+            client = client_class()
+            # compute_v1 only ships a REST transport; size its session pool for concurrent use.
+            # This relies on the transport's private _session (a google.auth AuthorizedSession).
+            # With mTLS the session already has a client-certificate adapter, so leave it in place.
+            session = client.transport._session
+            if not session.is_mtls:
+                session.mount("https://", HTTPAdapter(pool_maxsize=POOL_SIZE))
+            _clients[client_class] = client
+        return _clients[client_class]
+
+def get_zones(project):
+    """Return the zone names for the given project, cached per project."""
+    with _location_locks.setdefault(("zones", project), threading.Lock()):
+        if project not in _zones_cache:
+            client = get_client(compute_v1.ZonesClient)
+            _zones_cache[project] = [zone.name for zone in client.list(project=project, metadata=[("x-goog-fieldmask", LOCATION_FIELDS)])]
+    return _zones_cache[project]
+
+def get_regions(project):
+    """Return the region names for the given project, cached per project."""
+    with _location_locks.setdefault(("regions", project), threading.Lock()):
+        if project not in _regions_cache:
+            client = get_client(compute_v1.RegionsClient)
+            _regions_cache[project] = [region.name for region in client.list(project=project, metadata=[("x-goog-fieldmask", LOCATION_FIELDS)])]
+    return _regions_cache[project]
 
 def list_instances_with_external_ips(project):
     """List Compute Engine instances with external IPs in the given project."""
-    client = compute_v1.InstancesClient()
+    client = get_client(compute_v1.InstancesClient)
     instances = []
     try:
-        # List all instances across all zones
-        request = compute_v1.AggregatedListInstancesRequest(project=project)
-        for zone, response in client.aggregated_list(request=request):
-            if response.instances:
-                for instance in response.instances:
+        # List instances in each zone concurrently
+        with ThreadPoolExecutor(max_workers=LOCATION_WORKERS) as ex:
+            metadata = [("x-goog-fieldmask", INSTANCE_FIELDS)]
+            results = ex.map(lambda zone: (zone, list(client.list(project=project, zone=zone, metadata=metadata))),
+                             get_zones(project))
+            for zone, zone_instances in results:
+                for instance in zone_instances:
                     if instance.network_interfaces:
                         for interface in instance.network_interfaces:
                             if interface.access_configs:
@@ -22,7 +82,7 @@ def list_instances_with_external_ips(project):
                                     if config.nat_i_p:
                                         instances.append({
                                             'name': instance.name,
-                                            'zone': zone.split('/')[-1],
+                                            'zone': zone,
                                             'machine_type': instance.machine_type.split('/')[-1],
                                             'external_ip': config.nat_i_p
                                         })
@@ -33,18 +93,25 @@ def list_instances_with_external_ips(project):
 
 def list_external_addresses(project):
     """List external IP addresses in the given project."""
-    client = compute_v1.AddressesClient()
+    client = get_client(compute_v1.AddressesClient)
+    global_client = get_client(compute_v1.GlobalAddressesClient)
     addresses = []
+    metadata = [("x-goog-fieldmask", ADDRESS_FIELDS)]
+
+    def list_region(region):
+        if region == 'global':
+            return region, list(global_client.list(project=project, metadata=metadata))
+        return region, list(client.list(project=project, region=region, metadata=metadata))
+
     try:
-        # List all addresses across all regions
-        request = compute_v1.AggregatedListAddressesRequest(project=project)
-        for region, response in client.aggregated_list(request=request):
-            if response.addresses:
-                for address in response.addresses:
+        # List global and regional addresses concurrently
+        with ThreadPoolExecutor(max_workers=LOCATION_WORKERS) as ex:
+            for region, region_addresses in ex.map(list_region, ['global'] + get_regions(project)):
+                for address in region_addresses:
                     if address.address_type == "EXTERNAL":
                         addresses.append({
                             'name': address.name,
-                            'region': region.split('/')[-1] if region else 'global',
+                            'region': region,
                             'address': address.address
                         })
         return addresses
@@ -54,17 +121,24 @@ def list_external_addresses(project):
 
 def list_forwarding_rules(project):
     """List forwarding rules in the given project."""
-    client = compute_v1.ForwardingRulesClient()
+    client = get_client(compute_v1.ForwardingRulesClient)
+    global_client = get_client(compute_v1.GlobalForwardingRulesClient)
     rules = []
+    metadata = [("x-goog-fieldmask", FORWARDING_RULE_FIELDS)]
+
+    def list_region(region):
+        if region == 'global':
+            return region, list(global_client.list(project=project, metadata=metadata))
+        return region, list(client.list(project=project, region=region, metadata=metadata))
+
     try:
-        # List all forwarding rules across all regions
-        request = compute_v1.AggregatedListForwardingRulesRequest(project=project)
-        for region, response in client.aggregated_list(request=request):
-            if response.forwarding_rules:
-                for rule in response.forwarding_rules:
+        # List global and regional forwarding rules concurrently
+        with ThreadPoolExecutor(max_workers=LOCATION_WORKERS) as ex:
+            for region, region_rules in ex.map(list_region, ['global'] + get_regions(project)):
+                for rule in region_rules:
                     rules.append({
                         'name': rule.name,
-                        'region': region.split('/')[-1] if region else 'global',
+                        'region': region,
                         'ip_address': rule.I_p_address,
                         'ip_protocol': rule.I_p_protocol,
                         'target': rule.target.split('/')[-1] if rule.target else ''
@@ -74,6 +148,25 @@ def list_forwarding_rules(project):
         print(f"Error listing forwarding rules in {project}: {e}", file=sys.stderr)
         return []
 
+def print_project(project, instances, addresses, forwarding_rules_list):
+    """Print the resources found for a single project."""
+    # Check if there’s any output to display
+    if instances or addresses or forwarding_rules_list:
+        print(f"Project: {project}")
+        if instances:
+            print("Instance IPs:")
+            for inst in instances:
+                print(f"{inst['name']}  {inst['zone']}  {inst['machine_type']}  {inst['external_ip']}")
+        if addresses:
+            print("External Addresses:")
+            for addr in addresses:
+                print(f"{addr['name']}  {addr['region']}  {addr['address']}")
+        if forwarding_rules_list:
+            print("Forwarding Rules:")
+            for rule in forwarding_rules_list:
+                print(f"{rule['name']}  {rule['region']}  {rule['ip_address']}  {rule['ip_protocol']}  {rule['target']}")
+        print("----------------------------------------")
+
 def main():
     # Check if an input file was provided
     if len(sys.argv) < 2:
@@ -85,45 +178,31 @@ def main():
         print(f"Error: File '{input_file}' does not exist.", file=sys.stderr)
         sys.exit(1)
 
-    # Save the current CLOUDSDK_CORE_PROJECT (if set)
-    default_project = os.environ.get('CLOUDSDK_CORE_PROJECT', '')
-
     # Read the input file
     with open(input_file, 'r') as f:
-        projects = [line.strip() for line in f if line.strip()]
-
-    # Process each project
-    for project in projects:
-        print(f"Processing project: {project}")
-
-        # Set the project for API calls via environment variable
-        os.environ['CLOUDSDK_CORE_PROJECT'] = project
-
-        # Get resources
-        instances = list_instances_with_external_ips(project)
-        addresses = list_external_addresses(project)
-        forwarding_rules_list = list_forwarding_rules(project)
-
-        # Check if there’s any output to display
-        if instances or addresses or forwarding_rules_list:
-            print(f"Project: {project}")
-            if instances:
-                print("Instance IPs:")
-                for inst in instances:
-                    print(f"{inst['name']}  {inst['zone']}  {inst['machine_type']}  {inst['external_ip']}")
-            if addresses:
-                print("External Addresses:")
-                for addr in addresses:
-                    print(f"{addr['name']}  {addr['region']}  {addr['address']}")
-            if forwarding_rules_list:
-                print("Forwarding Rules:")
-                for rule in forwarding_rules_list:
-                    print(f"{rule['name']}  {rule['region']}  {rule['ip_address']}  {rule['ip_protocol']}  {rule['target']}")
-            print("----------------------------------------")
-
-    # Restore the original CLOUDSDK_CORE_PROJECT
-    if default_project:
-        os.environ['CLOUDSDK_CORE_PROJECT'] = default_project
+        projects = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+    # Each (project, resource type) pair is an independent task on one shared pool
+    scanners = {
+        'instances': list_instances_with_external_ips,
+        'addresses': list_external_addresses,
+        'forwarding_rules_list': list_forwarding_rules,
+    }
+    results = {}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        futures = {}
+        for project in projects:
+            print(f"Processing project: {project}")
+            for kind, scan in scanners.items():
+                futures[ex.submit(scan, project)] = (project, kind)
+
+        # Print each project as soon as all of its resource types are in
+        for future in as_completed(futures):
+            project, kind = futures[future]
+            project_results = results.setdefault(project, {})
+            project_results[kind] = future.result()
+            if len(project_results) == len(scanners):
+                print_project(project, **results.pop(project))
 
     print("Script completed.")
 
@@ -1,12 +1,37 @@
 #!/usr/bin/env python3
 
 from google.cloud import container_v1
-from kubernetes import client, config
+from kubernetes import client
 from google.auth import credentials
+from google.auth.transport.requests import Request
 import google.auth
 import requests.exceptions
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import base64
+import datetime
+import functools
 import json
+import os
 import csv
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+import urllib3
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+# Prefer orjson for decoding raw list responses when it is installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # Configuration
 PROJECT_ID = "your-project-id"  # Replace with your project ID
@@ -15,44 +40,172 @@ REGION = "your-region"  # Replace with your region (e.g., "us-central1")
 
 DEBUG=0
 
+# Refresh the cached access token when it is this close to expiry
+TOKEN_REFRESH_MARGIN = datetime.timedelta(seconds=300)
+# Serialises the expiry check and refresh across the export threads
+_token_lock = threading.Lock()
+
+# Page size and per-request timeout (seconds) for cluster-wide list calls
+LIST_PAGE_SIZE = 500
+REQUEST_TIMEOUT = 60
+
+# CSV columns for each endpoint type
+INGRESS_HEADERS = ["PROJECT_ID", "CLUSTER_NAME", "namespace", "ingress_name", "rule_count", "route", "service", "port", "ingress_class"]
+GATEWAY_HEADERS = ["PROJECT_ID", "CLUSTER_NAME", "namespace", "gateway_name", "gateway_class",
+                   "loadbalancer", "ip_address", "listener_count", "listener_name", "listener_protocol",
+                   "listener_port", "routes"]
+
+# CustomResourceDefinition that provides Gateway objects
+GATEWAY_CRD = "gateways.gateway.networking.k8s.io"
+
+# Rows buffered between the API reader and the CSV writer, and the file write buffer size
+CSV_QUEUE_SIZE = 1024
+CSV_BUFFER_SIZE = 1 << 16
+
+# Fail-fast timeouts (seconds) for the endpoint probes: TCP connect to the private
+# endpoint, and (connect, read) for the /version request
+PRIVATE_PROBE_TIMEOUT = 2.0
+VERSION_PROBE_TIMEOUT = (2, 5)
+
+# Errors that mean an endpoint is unusable and the next one should be tried
+CONNECT_ERRORS = (requests.exceptions.ConnectTimeout, client.exceptions.ApiException,
+                  urllib3.exceptions.HTTPError, OSError, ValueError)
+
+# Maximum concurrent connections to the API server from the shared ApiClient
+K8S_POOL_SIZE = 64
+K8S_RETRIES = Retry(total=3, backoff_factor=0.1, status_forcelist=(500, 502, 503, 504))
+
+# TCP keep-alive on API server connections so idle pooled connections stay usable
+K8S_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    K8S_SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30))
+
+# Cluster objects fetched from the GKE API, keyed by (project, region, cluster),
+# stored with their fetch time and reused for CLUSTER_CACHE_TTL seconds
+CLUSTER_CACHE_TTL = 300
+_cluster_cache = {}
+
+# API handles per endpoint choice, stored with the cluster object they were built from
+_k8s_apis = {}
+
+# Decoded cluster CA files, keyed by the base64 certificate from the GKE API
+_ca_cert_paths = {}
+
 def init_k8s_client(*, use_private_endpoint):
+    """Return cached API handles, reconnecting once the cached cluster metadata is refetched."""
+    cluster = _get_cluster()
+    cached = _k8s_apis.get(use_private_endpoint)
+    if cached is None or cached[0] is not cluster:
+        cached = (cluster, _connect_k8s(use_private_endpoint=use_private_endpoint))
+        _k8s_apis[use_private_endpoint] = cached
+    return cached[1]
+
+
+def _connect_k8s(*, use_private_endpoint):
     """Initialise K8s API client with public/private endpoint fallback"""
     # Try private
     try:
         private_config = get_cluster_credentials(use_private_endpoint=True)
+        apps_v1, core_v1, networking_v1, custom_api = build_apis(private_config)
 
-        core_v1 = client.CoreV1Api(api_client=client.ApiClient(configuration=private_config))
-        networking_v1 = client.NetworkingV1Api(api_client=client.ApiClient(configuration=private_config))
+        # Short TCP connect first so an unreachable private endpoint fails in seconds, not minutes
+        host = urlparse(private_config.host).hostname
+        socket.create_connection((host, 443), timeout=PRIVATE_PROBE_TIMEOUT).close()
 
-        namespaces = core_v1.list_namespace().items
+        # Cheap /version probe validates TLS and auth without listing anything
+        client.VersionApi(core_v1.api_client).get_code(_request_timeout=VERSION_PROBE_TIMEOUT)
         print("Connected successfully using private endpoint.")
-        return networking_v1, core_v1
-    except (requests.exceptions.ConnectTimeout, client.exceptions.ApiException) as e:
-        print(f"Private endpoint failed: str{(e)}. Falling back to public endpoint")
+        return apps_v1, core_v1, networking_v1, custom_api
+    except CONNECT_ERRORS as e:
+        print(f"Private endpoint failed: {str(e)}. Falling back to public endpoint")
 
         # Try public
         try:
             public_config = get_cluster_credentials(use_private_endpoint=False)
+            apps_v1, core_v1, networking_v1, custom_api = build_apis(public_config)
 
-            core_v1 = client.CoreV1Api(api_client=client.ApiClient(configuration=public_config))
-            networking_v1 = client.NetworkingV1Api(api_client=client.ApiClient(configuration=public_config))
-
-            namespaces = core_v1.list_namespace().items
+            client.VersionApi(core_v1.api_client).get_code(_request_timeout=VERSION_PROBE_TIMEOUT)
             print("Connected successfully using public endpoint.")
-            return networking_v1, core_v1
-        except (requests.exceptions.ConnectTimeout, client.exceptions.ApiException) as e:
+            return apps_v1, core_v1, networking_v1, custom_api
+        except CONNECT_ERRORS as e:
             print(f"Public endpoint failed: {str(e)}. Unable to connect to cluster.")
             raise Exception("Failed to connect using both public and private endpoints")
 
 
 
+def build_apis(k8s_config):
+    """Return Apps, Core, Networking and CustomObjects APIs sharing one ApiClient and connection pool."""
+    k8s_config.connection_pool_maxsize = K8S_POOL_SIZE
+    k8s_config.retries = K8S_RETRIES
+    k8s_config.refresh_api_key_hook = _refresh_token
+    # Make the tuned configuration the default so any other API object inherits it
+    client.Configuration.set_default(k8s_config)
+    api_client = client.ApiClient(configuration=k8s_config)
+    pool_kw = api_client.rest_client.pool_manager.connection_pool_kw
+    pool_kw["socket_options"] = K8S_SOCKET_OPTIONS
+    # List responses compress well; urllib3 transparently decompresses the body
+    api_client.set_default_header("Accept-Encoding", "gzip")
+    return (client.AppsV1Api(api_client),
+            client.CoreV1Api(api_client),
+            client.NetworkingV1Api(api_client),
+            client.CustomObjectsApi(api_client))
+
+
+@functools.lru_cache(maxsize=1)
+def _get_credentials():
+    """Resolve application default credentials once and reuse them."""
+    return google.auth.default()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_gke_client():
+    """Build a single ClusterManagerClient on the cached credentials."""
+    credentials, project = _get_credentials()
+    return container_v1.ClusterManagerClient(credentials=credentials)
+
+
+def _get_token():
+    """Return a bearer token, refreshing the cached credentials only near expiry."""
+    credentials, project = _get_credentials()
+    with _token_lock:
+        # google-auth stores expiry as naive UTC
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        if (not credentials.valid or
+            (credentials.expiry and credentials.expiry - now < TOKEN_REFRESH_MARGIN)):
+            credentials.refresh(Request())
+        return credentials.token
+
+
+def _refresh_token(k8s_config):
+    """Keep the bearer token current on a long-lived Configuration; called before each request."""
+    k8s_config.api_key["authorization"] = f"Bearer {_get_token()}"
+
+
+def _get_cluster():
+    """Fetch the configured cluster from the GKE API, reusing it until the cache TTL expires."""
+    key = (PROJECT_ID, REGION, CLUSTER_NAME)
+    cached = _cluster_cache.get(key)
+    if cached is None or time.monotonic() - cached[0] > CLUSTER_CACHE_TTL:
+        cluster_path = f"projects/{PROJECT_ID}/locations/{REGION}/clusters/{CLUSTER_NAME}"
+        cached = (time.monotonic(), _get_gke_client().get_cluster(name=cluster_path))
+        _cluster_cache[key] = cached
+    return cached[1]
+
+
+def _get_ca_cert_path(ca_cert_b64):
+    """Decode the cluster CA once and write it to a temp file, since the client needs a path."""
+    if ca_cert_b64 not in _ca_cert_paths:
+        with tempfile.NamedTemporaryFile(suffix=".crt", delete=False) as f:
+            f.write(base64.b64decode(ca_cert_b64))
+        atexit.register(os.remove, f.name)
+        _ca_cert_paths[ca_cert_b64] = f.name
+    return _ca_cert_paths[ca_cert_b64]
+
+
 def get_cluster_credentials(use_private_endpoint=False):
     """Authenticate and get Kubernetes cluster configuration."""
-    credentials, project = google.auth.default()
-    gke_client = container_v1.ClusterManagerClient(credentials=credentials)
-
-    cluster_path = f"projects/{PROJECT_ID}/locations/{REGION}/clusters/{CLUSTER_NAME}"
-    cluster = gke_client.get_cluster(name=cluster_path)
+    cluster = _get_cluster()
+    token = _get_token()
 
     if use_private_endpoint:
         endpoint = cluster.private_cluster_config.private_endpoint
@@ -63,157 +216,190 @@ def get_cluster_credentials(use_private_endpoint=False):
 
     k8s_config = client.Configuration()
     k8s_config.host = f"https://{endpoint}"
-    k8s_config.api_key["authorization"] = f"Bearer {credentials.token}"
+    k8s_config.api_key["authorization"] = f"Bearer {token}"
     k8s_config.verify_ssl = True
-    k8s_config.ssl_ca_cert = cluster.master_auth.cluster_ca_certificate.encode()
+    k8s_config.ssl_ca_cert = _get_ca_cert_path(cluster.master_auth.cluster_ca_certificate)
+    return k8s_config
 
-    config.load_kube_config_from_dict(config_dict={
-        "apiVersion": "v1",
-        "clusters": [{"name": "gke-cluster", "cluster": {"server": k8s_config.host, "certificate-authority-data": cluster.master_auth.cluster_ca_certificate}}],
-        "contexts": [{"name": "gke-context", "context": {"cluster": "gke-cluster", "user": "gke-user"}}],
-        "current-context": "gke-context",
-        "kind": "Config",
-        "users": [{"name": "gke-user", "user": {"token": credentials.token}}]
-    })
 
 
+def list_all(list_fn, raw=False, **kwargs):
+    """Page through a cluster-wide list call, yielding items as each page arrives."""
+    # raw=True decodes the response JSON directly and yields dicts, skipping the client's model objects
+    _continue = None
+    while True:
+        resp = list_fn(limit=LIST_PAGE_SIZE, _continue=_continue, _request_timeout=REQUEST_TIMEOUT,
+                       _preload_content=not raw, **kwargs)
+        if raw:
+            resp = _json_loads(resp.data)
+        # Raw responses and custom object APIs are plain dicts rather than model objects
+        if isinstance(resp, dict):
+            yield from resp.get("items", [])
+            _continue = resp.get("metadata", {}).get("continue")
+        else:
+            yield from resp.items
+            _continue = resp.metadata._continue
+        if not _continue:
+            break
 
-def list_workloads_and_routes(netApi, coreApi):
-    """Loop through workloads and print project, workload name, and route on each line."""
-    v1 = client.AppsV1Api()
-    core_v1 = client.CoreV1Api()
-    networking_v1 = client.NetworkingV1Api()
-
-    # Get all namespaces
-    namespaces = coreApi.list_namespace().items
-    for ns in namespaces:
-        namespace = ns.metadata.name
-
-        # Get all deployments (workloads) in the namespace
-        deployments = v1.list_namespaced_deployment(namespace).items
-        if not deployments:
-            continue
 
-        for deployment in deployments:
-            dep_name = deployment.metadata.name
 
-            # Get selector for the deployment
-            selector = deployment.spec.selector.match_labels
-            selector_str = ",".join([f"{k}={v}" for k, v in selector.items()])
+def list_by_namespace(list_fn):
+    """Run a cluster-wide list call and group the returned objects by namespace."""
+    by_ns = defaultdict(list)
+    for item in list_all(list_fn):
+        by_ns[item.metadata.namespace].append(item)
+    return by_ns
 
-            # Get services in the namespace
-            services = core_v1.list_namespaced_service(namespace).items
-            service_names = [s.metadata.name for s in services]
 
-            # Get Ingress resources in the namespace
-            ingresses = netApi.list_namespaced_ingress(namespace).items
-            for ingress in ingresses:
-                for rule in ingress.spec.rules or []:
-                    for path in rule.http.paths or []:
-                        svc_name = path.backend.service.name
-                        # Check if the service is tied to the deployment
-                        for service in services:
-                            svc_selector = service.spec.selector or {}
-                            svc_selector_str = ",".join([f"{k}={v}" for k, v in svc_selector.items()])
-                            if (svc_name == service.metadata.name and
-                                (svc_selector == selector or svc_name.startswith(dep_name))):
-                                # Format route as host + path
-                                route = f"{rule.host}{path.path or '/'}"
-                                # Print project, workload name, and route on the same line
-                                print(f"{project_id:<20} {dep_name:<30} {route}")
 
+def list_workloads_and_routes(appsApi, netApi, coreApi, project_id=None):
+    """Loop through workloads and print project, workload name, and route on each line."""
+    # Read PROJECT_ID at call time, as list_ingresses and list_gateways do
+    project_id = project_id or PROJECT_ID
+    # List Ingress resources, deployments (workloads) and services cluster-wide, bucketed by namespace
+    ingresses_by_ns = list_by_namespace(netApi.list_ingress_for_all_namespaces)
+
+    # Without any Ingress there are no routes, so skip the larger deployment and service lists
+    if not ingresses_by_ns:
+        return
+
+    # Deployments and services are independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        deployments = ex.submit(list_by_namespace, appsApi.list_deployment_for_all_namespaces)
+        services = ex.submit(list_by_namespace, coreApi.list_service_for_all_namespaces)
+        deployments_by_ns = deployments.result()
+        services_by_ns = services.result()
+
+    row_fmt = "{:<20} {:<30} {}\n".format
+    out = []
+
+    for namespace, deployments in deployments_by_ns.items():
+        # Only namespaces with Ingress resources can produce routes
+        if namespace not in ingresses_by_ns:
+            continue
 
+        # Index each service's selector as a frozenset so matching is a single comparison
+        svc_selectors = {s.metadata.name: frozenset((s.spec.selector or {}).items()) for s in services_by_ns[namespace]}
 
-def list_ingresses(netApi, coreApi):
-    """Loop through Ingress resources and print project and route on each line."""
+        # Index deployments by selector and by name so each backend resolves with dict probes
+        dep_by_selector = defaultdict(list)
+        dep_names = set()
+        for deployment in deployments:
+            dep_name = deployment.metadata.name
+            # A deployment selecting only by matchExpressions has no labels to compare
+            match_labels = deployment.spec.selector.match_labels
+            if match_labels:
+                dep_by_selector[frozenset(match_labels.items())].append(dep_name)
+            dep_names.add(dep_name)
+
+        # Walk each ingress path once and attach its route to the matching deployments
+        routes_by_dep = defaultdict(list)
+        # Flatten rules and paths into (host, path) pairs, skipping rules without an http block
+        paths = [(rule.host, path)
+                 for ingress in ingresses_by_ns[namespace]
+                 for rule in ingress.spec.rules or ()
+                 if rule.http
+                 for path in rule.http.paths or ()]
+        for host, path in paths:
+            svc_name = path.backend.service.name
+            svc_selector_set = svc_selectors.get(svc_name)
+            if svc_selector_set is None:
+                continue
+            # Deployments selecting the same pods, or whose name prefixes the service name
+            # Selector-less services (ExternalName, manual endpoints) only match by name
+            matches = set(dep_by_selector.get(svc_selector_set, ())) if svc_selector_set else set()
+            prefixes = (svc_name[:i] for i in range(1, len(svc_name) + 1))
+            matches.update(prefix for prefix in prefixes if prefix in dep_names)
+            if not matches:
+                continue
+            # Format route as host + path
+            route = "".join((host or "", path.path or "/"))
+            for dep_name in matches:
+                routes_by_dep[dep_name].append(route)
+
+        append = out.append
+        for deployment in deployments:
+            dep_name = deployment.metadata.name
+            for route in routes_by_dep.get(dep_name, ()):
+                # Project, workload name, and route on the same line
+                append(row_fmt(project_id, dep_name, route))
 
-    print(f"Getting ingresses...")
+    # Emit all lines in one write
+    sys.stdout.writelines(out)
 
-    custom_api = client.CustomObjectsApi()
 
-    ingress_endpoints={}
-    headers = ["PROJECT_ID", "CLUSTER_NAME", "namespace", "ingress_name", "rule_count", "route", "service", "port", "ingress_class"]
 
-    # Get all namespaces
-    namespaces = coreApi.list_namespace().items
-    for ns in namespaces:
-        namespace = ns.metadata.name
-        print(f"Looking at {namespace}") if DEBUG else None
+def list_ingresses(netApi):
+    """Loop through Ingress resources and yield one CSV row per route."""
 
-        # Get all Ingress resources in the namespace
-        ingresses = netApi.list_namespaced_ingress(namespace=namespace).items
-        if not ingresses:
-            continue
+    print(f"Getting ingresses...")
 
-        for ingress in ingresses:
-            annotations = ingress.metadata.annotations
-            ingress_name = ingress.metadata.name
-            ingress_class_key = "kubernetes.io/ingress.class"
-            ingress_class = None #default if no class
-
-            if annotations and ingress_class_key in annotations:
-                ingress_class = annotations[ingress_class_key]
-                print(f"Ingress: {ingress_name}, class: {ingress_class}") if DEBUG else None
-
-            rule_count=0
-            for rule in ingress.spec.rules or []:
-                for path in rule.http.paths or []:
-                    route   = f"{rule.host}{path.path or '/'}"
-                    service = path.backend.service.name
-                    port    = str(path.backend.service.port.number)
-                    print(f"About to assign ingress_endpoints using {PROJECT_ID}, {CLUSTER_NAME}, {namespace}, {ingress_class}, {ingress_name}, {rule_count}, {route}, {service}, {port}") if DEBUG else None
-                    # Use setdefault to create the multi-layer dict from the empty dict
-                    ingress_endpoints.setdefault(PROJECT_ID, {}) \
-                      .setdefault(CLUSTER_NAME, {}) \
-                      .setdefault(namespace, {}) \
-                      .setdefault(ingress_name, {}) \
-                      [rule_count] = {
-                         "route": route,
-                         "service": service,
-                         "port": port,
-                         "ingress_class": ingress_class
-                      }
-                    rule_count += 1
-
-    return ingress_endpoints, headers
-
-
-def list_gateways(coreApi):
-    """Loop through Gateway resources and extract relevant information."""
+    project_id, cluster_name = PROJECT_ID, CLUSTER_NAME
+
+    # Get all Ingress resources across the cluster as plain dicts; only a few fields are read
+    for ingress in list_all(netApi.list_ingress_for_all_namespaces, raw=True):
+        metadata = ingress["metadata"]
+        namespace = metadata["namespace"]
+        annotations = metadata.get("annotations")
+        ingress_name = metadata["name"]
+        ingress_class_key = "kubernetes.io/ingress.class"
+        ingress_class = None #default if no class
+
+        if annotations and ingress_class_key in annotations:
+            ingress_class = annotations[ingress_class_key]
+            if DEBUG:
+                print(f"Ingress: {ingress_name}, class: {ingress_class}")
+
+        # Flatten rules and paths into (host, path) pairs, skipping rules without an http block
+        paths = [(rule.get("host"), path)
+                 for rule in ingress["spec"].get("rules") or ()
+                 if rule.get("http")
+                 for path in rule["http"].get("paths") or ()]
+
+        rule_count=0
+        for host, path in paths:
+            backend = path["backend"]["service"]
+            route   = "".join((host or "", path.get("path") or "/"))
+            service = backend["name"]
+            port    = str(backend["port"].get("number"))
+            if DEBUG:
+                print(f"About to add ingress row using {project_id}, {cluster_name}, {namespace}, {ingress_class}, {ingress_name}, {rule_count}, {route}, {service}, {port}")
+            yield {
+                "PROJECT_ID": project_id,
+                "CLUSTER_NAME": cluster_name,
+                "namespace": namespace,
+                "ingress_name": ingress_name,
+                "rule_count": rule_count,
+                "route": route,
+                "service": service,
+                "port": port,
+                "ingress_class": ingress_class,
+            }
+            rule_count += 1
+
+
+
+def list_gateways(customApi):
+    """Loop through Gateway resources and yield one CSV row per listener."""
 
     print(f"Getting gateways...")
 
-    custom_api = client.CustomObjectsApi()
-
-    gateway_endpoints = {}
-    headers = ["PROJECT_ID", "CLUSTER_NAME", "namespace", "gateway_name", "gateway_class",
-               "loadbalancer", "ip_address", "listener_count", "listener_name", "listener_protocol",
-               "listener_port", "routes"]
-
-    # Get namespaces
-    namespaces = coreApi.list_namespace().items
-    for ns in namespaces:
-        namespace = ns.metadata.name
-        print(f"Looking at {namespace}") if DEBUG else None
-
-        try:
-            gateways = custom_api.list_namespaced_custom_object(
-                group="gateway.networking.k8s.io",
-                version="v1",
-                namespace=namespace,
-                plural="gateways"
-            ).get("items", [])
-        except Exception as e:
-            print(f"Error fetching gateways in {namespace}: {e}")
-            continue
-
-        if not gateways:
-            continue
+    project_id, cluster_name = PROJECT_ID, CLUSTER_NAME
 
+    # Page through all Gateway resources across the cluster
+    gateways = list_all(customApi.list_cluster_custom_object,
+                        group="gateway.networking.k8s.io",
+                        version="v1",
+                        plural="gateways")
+    try:
         for gateway in gateways:
+            namespace = gateway["metadata"]["namespace"]
             gateway_name = gateway["metadata"]["name"]
-            print(f"Name of gateway is {gateway_name}") if DEBUG else None
-            gateway_class = gateway["spec"].get("gatewayClassName", "None")  # Default to "None"
+            if DEBUG:
+                print(f"Name of gateway is {gateway_name}")
+            spec = gateway["spec"]
+            gateway_class = spec.get("gatewayClassName", "None")  # Default to "None"
             loadbalancer = None
             ip_address = None
 
@@ -231,132 +417,110 @@ def list_gateways(coreApi):
                         ip_address = address["value"]
                         loadbalancer = "inferred"
 
-            print(f"Gateway: {gateway_name}, class: {gateway_class}, IP: {ip_address or 'None'}, LB: {loadbalancer or 'None'}") if DEBUG else None
+            if DEBUG:
+                print(f"Gateway: {gateway_name}, class: {gateway_class}, IP: {ip_address or 'None'}, LB: {loadbalancer or 'None'}")
 
             listener_count = 0
-            for listener in gateway["spec"].get("listeners", []):
-                listener_name = listener.get("name")
-                listener_protocol = listener.get("protocol")
-                listener_port = str(listener.get("port"))
+            for listener in spec.get("listeners", []):
+                get = listener.get
+                listener_name = get("name")
+                listener_protocol = get("protocol")
+                listener_port = str(get("port"))
 
                 # Routes: Placeholder for correlated route data
                 # For simplicity, set as "N/A"; see notes below for full route correlation
                 routes = "N/A"
 
-                print(f"About to assign gateway_endpoints using {PROJECT_ID}, {CLUSTER_NAME}, {namespace}, {gateway_name}, {gateway_class}, {loadbalancer}, {ip_address}, {listener_count}, {listener_name}, {listener_protocol}, {listener_port}, {routes}") if DEBUG else None
-
-                # Build the nested dictionary
-                gateway_endpoints.setdefault(PROJECT_ID, {}) \
-                    .setdefault(CLUSTER_NAME, {}) \
-                    .setdefault(namespace, {}) \
-                    .setdefault(gateway_name, {}) \
-                    [listener_count] = {
-                        "gateway_class": gateway_class,
-                        "loadbalancer": loadbalancer or "None",
-                        "ip_address": ip_address or "None",
-                        "listener_count": listener_count,
-                        "listener_name": listener_name,
-                        "listener_protocol": listener_protocol,
-                        "listener_port": listener_port,
-                        "routes": routes
-                    }
+                if DEBUG:
+                    print(f"About to add gateway row using {project_id}, {cluster_name}, {namespace}, {gateway_name}, {gateway_class}, {loadbalancer}, {ip_address}, {listener_count}, {listener_name}, {listener_protocol}, {listener_port}, {routes}")
+
+                yield {
+                    "PROJECT_ID": project_id,
+                    "CLUSTER_NAME": cluster_name,
+                    "namespace": namespace,
+                    "gateway_name": gateway_name,
+                    "gateway_class": gateway_class,
+                    "loadbalancer": loadbalancer or "None",
+                    "ip_address": ip_address or "None",
+                    "listener_count": listener_count,
+                    "listener_name": listener_name,
+                    "listener_protocol": listener_protocol,
+                    "listener_port": listener_port,
+                    "routes": routes
+                }
                 listener_count += 1
+    except client.exceptions.ApiException as e:
+        if e.status == 404:
+            print(f"Gateway API CRD {GATEWAY_CRD} not installed, skipping gateways")
+        else:
+            print(f"Error fetching gateways: {e}")
 
-    return gateway_endpoints, headers
-
-
-def flatten_ingress_data(data):
-    """ Take multi-level dicts and flatten so we can later write to csv"""
-    print(f"Flattening ingress data") if DEBUG else None
-    rows = []
-
-    for project_id, clusters in data.items():
-        for cluster_name, namespaces in clusters.items():
-            for namespace, ingresses in namespaces.items():
-                for ingress_name, rules in ingresses.items():
-                    for rule_count, details in rules.items():
-                        rows.append({
-                            "PROJECT_ID": project_id,
-                            "CLUSTER_NAME": cluster_name,
-                            "namespace": namespace,
-                            "ingress_name": ingress_name,
-                            "rule_count": rule_count,
-                            "route": details["route"],
-                            "service": details["service"],
-                            "port": details["port"],
-                            "ingress_class": details["ingress_class"],
-                        })
-
-    return rows
-
-
-
-def flatten_gateway_data(data):
-    """ Take multi-level dicts and flatten so we can later write to csv"""
-    print(f"Flattening gateway data") if DEBUG else None
-    rows = []
-
-    for project_id, clusters in data.items():
-        for cluster_name, namespaces in clusters.items():
-            for namespace, gateways in namespaces.items():
-                for gateway_name, listeners in gateways.items():
-                    for listener_count, details in listeners.items():
-                        rows.append({
-                            "PROJECT_ID": project_id,
-                            "CLUSTER_NAME": cluster_name,
-                            "namespace": namespace,
-                            "gateway_name": gateway_name,
-                            "gateway_class": details["gateway_class"],
-                            "loadbalancer": details["loadbalancer"],
-                            "ip_address": details["ip_address"],
-                            "listener_count": details["listener_count"],
-                            "listener_name": details["listener_name"],
-                            "listener_protocol": details["listener_protocol"],
-                            "listener_port": details["listener_port"],
-                            "routes": details["routes"]
-                        })
-
-    return rows
-
-
-
-def write_csv(data, headers, endpoint_type="default"):
-
-    if endpoint_type == "ingresses":
-        filename = "ingresses.csv"
-    elif endpoint_type == "gateways":
-        filename = "gateways.csv"
-    else:
-        filename = "default.csv"
 
 
-    """ Write data to CSV file """
-    print(f"Writing CSV file for {endpoint_type}")
-    with open(filename, "w", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=headers)
-        writer.writeheader()
-        writer.writerows(data)
+def write_csv(rows, headers, filename):
+    """ Write rows to CSV file as they are produced """
 
+    # Read rows from the API on a separate thread so fetching overlaps disk writes
+    row_queue = queue.Queue(maxsize=CSV_QUEUE_SIZE)
+    done = object()
+    errors = []
+    stop = threading.Event()
 
+    def produce():
+        try:
+            for row in rows:
+                if stop.is_set():
+                    break
+                row_queue.put(row)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            row_queue.put(done)
 
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
 
-def main():
+    print(f"Writing CSV file {filename}")
     try:
-        networking_v1, core_v1             = init_k8s_client(use_private_endpoint=True)
-        ingress_endpoints, ingress_headers = list_ingresses(netApi=networking_v1, coreApi=core_v1)
-        gateway_endpoints, gateway_headers = list_gateways(coreApi=core_v1)
-        flat_ingress_data                  = flatten_ingress_data(ingress_endpoints)
-        flat_gateway_data                  = flatten_gateway_data(gateway_endpoints)
+        with open(filename, "w", newline="", buffering=CSV_BUFFER_SIZE) as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=headers)
+            writer.writeheader()
+            writer.writerows(iter(row_queue.get, done))
+    finally:
+        # If writing failed, stop the producer and drain the queue so a blocked put() returns
+        stop.set()
+        while True:
+            try:
+                row_queue.get_nowait()
+            except queue.Empty:
+                break
 
+    producer.join()
+    if errors:
+        raise errors[0]
+
+
+
+
+def main():
+    try:
+        apps_v1, core_v1, networking_v1, custom_api = init_k8s_client(use_private_endpoint=True)
 
-        print(f"Ingress headers are {ingress_headers}") if DEBUG else None
-        print(f"Gateway headers are {gateway_headers}") if DEBUG else None
+        if DEBUG:
+            print(f"Ingress headers are {INGRESS_HEADERS}")
+            print(f"Gateway headers are {GATEWAY_HEADERS}")
 
-        write_csv(flat_ingress_data, ingress_headers, endpoint_type="ingresses")
-        write_csv(flat_gateway_data, gateway_headers, endpoint_type="gateways")
+        # Ingress and gateway exports are independent, so run them side by side
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            exports = [
+                ex.submit(write_csv, list_ingresses(netApi=networking_v1), INGRESS_HEADERS, "ingresses.csv"),
+                ex.submit(write_csv, list_gateways(customApi=custom_api), GATEWAY_HEADERS, "gateways.csv"),
+            ]
+            for export in exports:
+                export.result()
 
         #gateway_endpoints      = list_gateway_routes(netApi=networking_v1, coreApi=core_v1)
-        #list_workloads_and_routes(netApi=networking_v1, coreApi=core_v1)
+        #list_workloads_and_routes(appsApi=apps_v1, netApi=networking_v1, coreApi=core_v1, project_id=PROJECT_ID)
     except Exception as e:
         print(f"Error: {e}")
 